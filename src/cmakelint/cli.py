@@ -33,25 +33,32 @@ def print_categories():
     sys.exit(0)
 
 
+# Maps the "key=" (or bare flag) that starts an option file line to its option name
+_OPTION_FILE_KEYS = {
+    "filter=": "filter",
+    "spaces=": "spaces",
+    "linelength=": "linelength",
+    "quiet": "quiet",
+}
+
+
 def parse_option_file(contents, ignore_space):
-    filters = None
-    spaces = None
-    linelength = None
+    options = {}
     for line in contents:
         line = line.strip()
         if not line or line.startswith("#"):
             continue
-        if line.startswith("filter="):
-            filters = line.replace("filter=", "")
-        if line.startswith("spaces="):
-            spaces = line.replace("spaces=", "")
-        if line == "quiet":
-            LINT_STATE.set_quiet(True)
-        if line.startswith("linelength="):
-            linelength = line.replace("linelength=", "")
-    LINT_STATE.set_filters(filters)
+        key, sep, value = line.partition("=")
+        option = _OPTION_FILE_KEYS.get(key + sep)
+        if option is not None:
+            options[option] = value
+    if "quiet" in options:
+        LINT_STATE.set_quiet(True)
+    LINT_STATE.set_filters(options.get("filter"))
+    spaces = options.get("spaces")
     if spaces and not ignore_space:
         LINT_STATE.set_spaces(int(spaces.strip()))
+    linelength = options.get("linelength")
     if linelength is not None:
         LINT_STATE.set_line_length(linelength)
 
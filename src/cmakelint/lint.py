@@ -16,16 +16,17 @@ the License.
 
 from __future__ import annotations
 
+import mmap
 import os
 import re
+from typing import NamedTuple
 
 from cmakelint.state import LINT_STATE, PACKAGE_STATE, _CMakePackageState, is_find_package
 
-_RE_COMMAND = re.compile(r"^\s*(\w+)(\s*)\(", re.VERBOSE)
-_RE_COMMAND_START_SPACES = re.compile(r"^\s*\w+\s*\((\s*)", re.VERBOSE)
-_RE_COMMAND_END_SPACES = re.compile(r"(\s*)\)", re.VERBOSE)
-_RE_LOGIC_CHECK = re.compile(r"(\w+)\s*\(\s*\S+[^)]+\)", re.VERBOSE)
-_RE_COMMAND_ARG = re.compile(r"(\w+)", re.VERBOSE)
+_RE_LOGIC_CHECK = re.compile(r"(\w+)\s*\(\s*\S+[^)]+\)")
+_RE_COMMAND_ARG = re.compile(r"(\w+)")
+# Files larger than this are mapped instead of read into a bytes object
+_MMAP_THRESHOLD = 64 * 1024
 _logic_commands = """
 else
 endforeach
@@ -34,6 +35,7 @@ endif
 endmacro
 endwhile
 """.split()
+_RE_ANY_LOGIC = re.compile(r"\b(" + "|".join(_logic_commands) + r")\b")
 
 
 def clean_comments(line, quote=False):
@@ -41,12 +43,15 @@ def clean_comments(line, quote=False):
     quote means 'was in a quote starting this line' so that
     quoted lines can be eaten/removed.
     """
-    if line.find("#") == -1 and line.find('"') == -1:
+    if '"' not in line:
+        # Without quotes the line is either inside a quote or cut at the first #
         if quote:
             return "", quote
-        else:
+        comment = line.find("#")
+        if comment == -1:
             return line, quote
-    # else have to check for comment
+        return line[:comment].rstrip(), quote
+    # else have to track quotes to find the comment
     prior = []
     prev = ""
     for char in line:
@@ -68,34 +73,87 @@ def clean_comments(line, quote=False):
     return "".join(prior).rstrip(), quote
 
 
+class LineInfo(NamedTuple):
+    command: str
+    spaces_before_paren: int
+    spaces_after_open: int
+    spaces_before_end: int | None
+
+
+_NO_COMMAND = LineInfo("", 0, 0, None)
+
+
+def _is_word(text):
+    # Same characters as \w: alphanumerics and underscores
+    return text.replace("_", "0").isalnum()
+
+
+def _scan_line(line):
+    """
+    Scan a cleaned line once for the command that opens it and the first
+    closing parenthesis. spaces_before_end is None if the line has no ')'.
+    """
+    end = line.find(")")
+    if end == -1:
+        spaces_before_end = None
+    else:
+        before_end = line[:end]
+        spaces_before_end = len(before_end) - len(before_end.rstrip())
+    paren = line.find("(")
+    if paren == -1:
+        if spaces_before_end is None:
+            return _NO_COMMAND
+        return LineInfo("", 0, 0, spaces_before_end)
+    head = line[:paren]
+    command = head.strip()
+    if not _is_word(command):
+        return LineInfo("", 0, 0, spaces_before_end)
+    args = line[paren + 1 :]
+    return LineInfo(
+        command,
+        len(head) - len(head.rstrip()),
+        len(args) - len(args.lstrip()),
+        spaces_before_end,
+    )
+
+
 class CleansedLines:
     def __init__(self, lines):
         self.have_seen_uppercase = None
         self.raw_lines = lines
         self.lines = []
+        self.lines_lower = []
+        self.info = []
         quote = False
         for line in lines:
             cleaned, quote = clean_comments(line, quote)
             self.lines.append(cleaned)
+            self.lines_lower.append(cleaned.lower())
+            self.info.append(_scan_line(cleaned))
+        # Tabs are rare, so scan the whole text once before looking at single lines
+        self.tab_lines = set()
+        if "\t" in "\n".join(lines):
+            self.tab_lines = {i for i, line in enumerate(lines) if "\t" in line}
+        # Index of the first line at or after each line that contains a ')', or -1
+        self.command_end_line = [-1] * len(self.lines)
+        end_line = -1
+        for i in range(len(self.lines) - 1, -1, -1):
+            if self.info[i].spaces_before_end is not None:
+                end_line = i
+            self.command_end_line[i] = end_line
 
     def line_numbers(self):
         return range(0, len(self.lines))
 
 
 def should_print_error(category):
-    should_print = True
-    for f in LINT_STATE.filters:
-        if f.startswith("-") and category.startswith(f[1:]):
-            should_print = False
-        elif f.startswith("+") and category.startswith(f[1:]):
-            should_print = True
-    return should_print
+    return LINT_STATE.should_print_error(category)
 
 
 def error(filename, linenumber, category, message):
     if should_print_error(category):
         LINT_STATE.errors += 1
-        print(f"{filename}:{linenumber}: {message} [{category}]")
+        LINT_STATE.print_error(f"{filename}:{linenumber}: {message} [{category}]")
 
 
 def check_line_length(filename, linenumber, clean_lines, errors):
@@ -110,34 +168,32 @@ def check_line_length(filename, linenumber, clean_lines, errors):
 
 
 def contains_command(line):
-    return _RE_COMMAND.match(line)
+    return bool(_scan_line(line).command)
 
 
 def get_command(line):
-    match = _RE_COMMAND.match(line)
-    if match:
-        return match.group(1)
-    return ""
+    return _scan_line(line).command
 
 
 def is_command_mixed_case(command):
-    lower = command.lower()
-    upper = command.upper()
-    return not (command == lower or command == upper)
+    if command.islower() or command.isupper():
+        return False
+    # Neither test passes for commands without cased characters, e.g. "_1"
+    return command.lower() != command
 
 
 def is_command_upper_case(command):
-    upper = command.upper()
-    return command == upper
+    if command.isupper():
+        return True
+    return not command.islower() and command.lower() == command
 
 
 def check_upper_lower_case(filename, linenumber, clean_lines, errors):
     """
     Check that commands are either lower case or upper case, but not both
     """
-    line = clean_lines.lines[linenumber]
-    if contains_command(line):
-        command = get_command(line)
+    command = clean_lines.info[linenumber].command
+    if command:
         if is_command_mixed_case(command):
             return errors(filename, linenumber, "readability/wonkycase", "Do not use mixed case commands")
         if clean_lines.have_seen_uppercase is None:
@@ -149,45 +205,28 @@ def check_upper_lower_case(filename, linenumber, clean_lines, errors):
 
 
 def get_initial_spaces(line):
-    initial_spaces = 0
-    while initial_spaces < len(line) and line[initial_spaces] == " ":
-        initial_spaces += 1
-    return initial_spaces
+    return len(line) - len(line.lstrip(" "))
 
 
 def check_command_spaces(filename, linenumber, clean_lines, errors):
     """
     No extra spaces between command and parenthesis
     """
-    line = clean_lines.lines[linenumber]
-    match = contains_command(line)
-    if match and len(match.group(2)):
-        errors(filename, linenumber, "whitespace/extra", "Extra spaces between '%s' and its ()" % (match.group(1)))
-    if match:
-        spaces_after_open = len(_RE_COMMAND_START_SPACES.match(line).group(1))
-        initial_spaces = get_initial_spaces(line)
-        initial_linenumber = linenumber
-        end = None
-        while True:
-            line = clean_lines.lines[linenumber]
-            end = _RE_COMMAND_END_SPACES.search(line)
-            if end:
-                break
-            linenumber += 1
-            if linenumber >= len(clean_lines.lines):
-                break
-        if linenumber == len(clean_lines.lines) and not end:
-            errors(filename, initial_linenumber, "syntax", "Unable to find the end of this command")
-        if end:
-            spaces_before_end = len(end.group(1))
-            initial_spaces = get_initial_spaces(line)
-            if initial_linenumber != linenumber and spaces_before_end >= initial_spaces:
+    info = clean_lines.info[linenumber]
+    if info.command and info.spaces_before_paren:
+        errors(filename, linenumber, "whitespace/extra", "Extra spaces between '%s' and its ()" % (info.command))
+    if info.command:
+        end_line = clean_lines.command_end_line[linenumber]
+        if end_line == -1:
+            errors(filename, linenumber, "syntax", "Unable to find the end of this command")
+        else:
+            spaces_before_end = clean_lines.info[end_line].spaces_before_end
+            initial_spaces = get_initial_spaces(clean_lines.lines[end_line])
+            if end_line != linenumber and spaces_before_end >= initial_spaces:
                 spaces_before_end -= initial_spaces
 
-            if spaces_after_open != spaces_before_end:
-                errors(
-                    filename, initial_linenumber, "whitespace/mismatch", "Mismatching spaces inside () after command"
-                )
+            if info.spaces_after_open != spaces_before_end:
+                errors(filename, linenumber, "whitespace/mismatch", "Mismatching spaces inside () after command")
 
 
 def check_repeat_logic(filename, linenumber, clean_lines, errors):
@@ -195,17 +234,17 @@ def check_repeat_logic(filename, linenumber, clean_lines, errors):
     Check for logic inside else, endif etc
     """
     line = clean_lines.lines[linenumber]
-    for cmd in _logic_commands:
-        if re.search(r"\b%s\b" % cmd, line.lower()):
-            m = _RE_LOGIC_CHECK.search(line)
-            if m:
-                errors(
-                    filename,
-                    linenumber,
-                    "readability/logic",
-                    f"Expression repeated inside {cmd}; " + f"better to use only {m.group(1)}()",
-                )
-            break
+    logic = _RE_ANY_LOGIC.search(clean_lines.lines_lower[linenumber])
+    if not logic:
+        return
+    m = _RE_LOGIC_CHECK.search(line)
+    if m:
+        errors(
+            filename,
+            linenumber,
+            "readability/logic",
+            f"Expression repeated inside {logic.group(1)}; " + f"better to use only {m.group(1)}()",
+        )
 
 
 def check_indent(filename, linenumber, clean_lines, errors):
@@ -226,10 +265,10 @@ def check_style(filename, linenumber, clean_lines, errors):
     check_indent(filename, linenumber, clean_lines, errors)
     check_command_spaces(filename, linenumber, clean_lines, errors)
     line = clean_lines.raw_lines[linenumber]
-    if line.find("\t") != -1:
+    if linenumber in clean_lines.tab_lines:
         errors(filename, linenumber, "whitespace/tabs", "Tab found; please use spaces")
 
-    if line and line[-1].isspace():
+    if line[-1:].isspace():
         errors(filename, linenumber, "whitespace/eol", "Line ends in whitespace")
 
     check_repeat_logic(filename, linenumber, clean_lines, errors)
@@ -252,8 +291,7 @@ def check_file_name(filename, errors):
 
 
 def get_command_argument(linenumber, clean_lines):
-    line = clean_lines.lines[linenumber]
-    skip = get_command(line)
+    skip = clean_lines.info[linenumber].command
     while True:
         line = clean_lines.lines[linenumber]
         m = _RE_COMMAND_ARG.finditer(line)
@@ -266,29 +304,35 @@ def get_command_argument(linenumber, clean_lines):
 
 
 def check_find_package(filename, linenumber, clean_lines, errors):
-    cmd = get_command(clean_lines.lines[linenumber])
+    lowered = clean_lines.lines_lower[linenumber]
+    if "include" not in lowered and "find_package_handle_standard_args" not in lowered:
+        return
+    cmd = clean_lines.info[linenumber].command.lower()
     if cmd:
-        if cmd.lower() == "include":
+        if cmd == "include":
             var_name = get_command_argument(linenumber, clean_lines)
             PACKAGE_STATE.have_included(var_name)
-        elif cmd.lower() == "find_package_handle_standard_args":
+        elif cmd == "find_package_handle_standard_args":
             var_name = get_command_argument(linenumber, clean_lines)
             PACKAGE_STATE.have_used_standard_args(filename, linenumber, var_name, errors)
 
 
-def process_line(filename, linenumber, clean_lines, errors):
+def process_line(filename, linenumber, clean_lines, errors, find_package=None):
     """
     Arguments:
-        filename    the name of the file
-        linenumber  the line number index
-        clean_lines CleansedLines instance
-        errors      the error handling function
+        filename     the name of the file
+        linenumber   the line number index
+        clean_lines  CleansedLines instance
+        errors       the error handling function
+        find_package whether filename is a Find module, computed if None
     """
     check_lint_pragma(filename, linenumber, clean_lines.raw_lines[linenumber], errors)
     check_line_length(filename, linenumber, clean_lines, errors)
     check_upper_lower_case(filename, linenumber, clean_lines, errors)
     check_style(filename, linenumber, clean_lines, errors)
-    if is_find_package(filename):
+    if find_package is None:
+        find_package = is_find_package(filename)
+    if find_package:
         check_find_package(filename, linenumber, clean_lines, errors)
 
 
@@ -297,12 +341,16 @@ def is_valid_file(filename):
 
 
 def process_file(filename):
+    if not is_valid_file(filename):
+        print("Ignoring file: " + filename)
+        return
     # Store and then restore the filters to prevent pragmas in the file from persisting.
     original_filters = list(LINT_STATE.filters)
     try:
         return _process_file(filename)
     finally:
         LINT_STATE.filters = original_filters
+        LINT_STATE.flush_output()
 
 
 def check_lint_pragma(filename, linenumber, line, errors=None):
@@ -315,30 +363,43 @@ def check_lint_pragma(filename, linenumber, line, errors=None):
             if errors:
                 errors(filename, linenumber, "syntax", str(ex))
         except:  # noqa: E722
+            LINT_STATE.flush_output()
             print(f"Exception occurred while processing '{filename}:{linenumber}':")
 
 
+def _read_file(filename):
+    """
+    Return the decoded contents of filename and whether it has CRLF line endings
+    """
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= _MMAP_THRESHOLD:
+            raw = f.read()
+            return raw.decode("utf-8", "replace"), b"\r\n" in raw
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return str(view, "utf-8", "replace"), mm.find(b"\r\n") != -1
+
+
 def _process_file(filename):
-    lines = ["# Lines start at 1"]
-    have_cr = False
-    if not is_valid_file(filename):
-        print("Ignoring file: " + filename)
-        return
     global PACKAGE_STATE
     PACKAGE_STATE = _CMakePackageState()
-    for line in open(filename).readlines():
-        line = line.rstrip("\n")
-        if line.endswith("\r"):
-            have_cr = True
-            line = line.rstrip("\r")
-        lines.append(line)
-        check_lint_pragma(filename, len(lines) - 1, line)
+    text, have_cr = _read_file(filename)
+    # Treat "\r\n", "\r" and "\n" all as line breaks, as universal newlines did
+    file_lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    if file_lines[-1] == "":
+        # A trailing newline ends the last line rather than starting a new one
+        file_lines.pop()
+    lines = ["# Lines start at 1"]
+    lines.extend(file_lines)
+    for linenumber, line in enumerate(lines):
+        if line.startswith("# "):
+            check_lint_pragma(filename, linenumber, line)
     lines.append("# Lines end here")
     # Check file name after reading lines incase of a # lint_cmake: pragma
     check_file_name(filename, error)
     if have_cr and os.linesep != "\r\n":
         error(filename, 0, "whitespace/newline", "Unexpected carriage return found; " "better to use only \\n")
     clean_lines = CleansedLines(lines)
-    for line in clean_lines.line_numbers():
-        process_line(filename, line, clean_lines, error)
+    find_package = is_find_package(filename)
+    for linenumber in range(len(clean_lines.lines)):
+        process_line(filename, linenumber, clean_lines, error, find_package)
     PACKAGE_STATE.done(filename, error)
@@ -16,26 +16,30 @@ the License.
 
 from __future__ import annotations
 
+import functools
 import os
-import re
+import sys
 
 from cmakelint.rules import ERROR_CATEGORIES
 
 
+@functools.lru_cache(maxsize=1)
 def default_rc():
     """
     Check current working directory and XDG_CONFIG_DIR before ~/.cmakelintrc
+    The result is cached, use default_rc.cache_clear() to probe again.
     """
+    home = os.path.expanduser("~")
     cwdfile = os.path.join(os.getcwd(), ".cmakelintrc")
     if os.path.exists(cwdfile):
         return cwdfile
-    xdg = os.path.join(os.path.expanduser("~"), ".config")
+    xdg = os.path.join(home, ".config")
     if "XDG_CONFIG_DIR" in os.environ:
         xdg = os.environ["XDG_CONFIG_DIR"]
     xdgfile = os.path.join(xdg, "cmakelintrc")
     if os.path.exists(xdgfile):
         return xdgfile
-    return os.path.join(os.path.expanduser("~"), ".cmakelintrc")
+    return os.path.join(home, ".cmakelintrc")
 
 
 def is_find_package(filename):
@@ -45,15 +49,54 @@ def is_find_package(filename):
 _DEFAULT_CMAKELINTRC = default_rc()
 
 
+# Every prefix of every category, so a filter is validated with one set lookup
+_ALLOWED_PREFIXES = frozenset(c[:k] for c in ERROR_CATEGORIES.split() for k in range(len(c) + 1))
+
+
+def _parse_filters(filters):
+    return [(f.startswith("+"), f[1:]) for f in filters if f.startswith(("-", "+"))]
+
+
+def _is_category_allowed(parsed_filters, category):
+    allowed = True
+    for allow, prefix in parsed_filters:
+        if category.startswith(prefix):
+            allowed = allow
+    return allowed
+
+
 class _CMakeLintState:
     def __init__(self):
-        self.filters = []
+        self.allowed_categories = ERROR_CATEGORIES.split()
         self.config: str | None = _DEFAULT_CMAKELINTRC
         self.errors = 0
         self.spaces = 2
         self.linelength = 80
-        self.allowed_categories = ERROR_CATEGORIES.split()
         self.quiet = False
+        self._out_buf: list[str] = []
+        self._parsed_filters: list[tuple[bool, str]] = []
+        self._category_allow: dict[str, bool] = {}
+        # Assigned last: the setter fills _parsed_filters and _category_allow
+        self.filters = []
+
+    @property
+    def filters(self):
+        return self._filters
+
+    @filters.setter
+    def filters(self, filters):
+        self._filters = filters
+        self._update_category_allow()
+
+    def _update_category_allow(self):
+        self._parsed_filters = _parse_filters(self._filters)
+        self._category_allow = {c: _is_category_allowed(self._parsed_filters, c) for c in self.allowed_categories}
+
+    def should_print_error(self, category):
+        allowed = self._category_allow.get(category)
+        if allowed is None:
+            return _is_category_allowed(self._parsed_filters, category)
+        return allowed
 
     def set_filters(self, filters):
         if not filters:
@@ -65,17 +108,22 @@ class _CMakeLintState:
             self.filters.extend([f.strip() for f in filters.split(",") if f])
         else:
             raise ValueError("Filters should be a list or a comma separated string")
+        self._update_category_allow()
         for f in self.filters:
-            if f.startswith("-") or f.startswith("+"):
-                allowed = False
-                for c in self.allowed_categories:
-                    if c.startswith(f[1:]):
-                        allowed = True
-                if not allowed:
+            if f.startswith(("-", "+")):
+                if f[1:] not in _ALLOWED_PREFIXES:
                     raise ValueError("Filter not allowed: %s" % f)
             else:
                 raise ValueError("Filter should start with - or +")
 
+    def print_error(self, message):
+        self._out_buf.append(message)
+
+    def flush_output(self):
+        if self._out_buf:
+            sys.stdout.write("\n".join(self._out_buf) + "\n")
+            self._out_buf.clear()
+
     def set_spaces(self, spaces: int):
         self.spaces = spaces
 
@@ -86,13 +134,14 @@ class _CMakeLintState:
         self.linelength = int(linelength)
 
     def reset(self):
+        self.allowed_categories = ERROR_CATEGORIES.split()
         self.filters = []
         self.config = _DEFAULT_CMAKELINTRC
         self.errors = 0
         self.spaces = 2
         self.linelength = 80
-        self.allowed_categories = ERROR_CATEGORIES.split()
         self.quiet = False
+        self._out_buf = []
 
 
 class _CMakePackageState:
@@ -100,14 +149,19 @@ class _CMakePackageState:
         self.sets = []
         self.have_included_stdargs = False
         self.have_used_stdargs = False
+        self._expected: dict[str, str] = {}
 
     def check(self, filename, linenumber, clean_lines, errors):
         pass
 
     def _get_expected(self, filename):
-        package = os.path.basename(filename)
-        package = re.sub(r"^Find(.*)\.cmake", lambda m: m.group(1), package)
-        return package.upper()
+        expected = self._expected.get(filename)
+        if expected is None:
+            package = os.path.basename(filename)
+            if package.startswith("Find") and package.endswith(".cmake"):
+                package = package[4:-6]
+            expected = self._expected[filename] = package.upper()
+        return expected
 
     def done(self, filename, errors):
         try:
@@ -15,6 +15,10 @@ the License.
 
 from __future__ import annotations
 
+import sys
+
+import pytest
+
 import cmakelint
 
 from .utils import (
@@ -49,12 +53,20 @@ def test_get_command():
     assert cmakelint.lint.get_command("VERSION") == ""
 
 
+def test_line_info():
+    info = cmakelint.lint.CleansedLines(["project ( Foo )", "  VERSION", "  1.0  )"]).info
+    assert info[0] == ("project", 1, 1, 1)
+    assert info[1] == ("", 0, 0, None)
+    assert info[2] == ("", 0, 0, 2)
+
+
 def test_is_command_upper_case():
     assert cmakelint.lint.is_command_upper_case("PROJECT")
     assert cmakelint.lint.is_command_upper_case("CMAKE_MINIMUM_REQUIRED")
     assert not cmakelint.lint.is_command_upper_case("cmake_minimum_required")
     assert not cmakelint.lint.is_command_upper_case("project")
     assert not cmakelint.lint.is_command_upper_case("PrOjEct")
+    assert cmakelint.lint.is_command_upper_case("_1")
 
 
 def test_is_command_mixed_case():
@@ -62,6 +74,7 @@ def test_is_command_mixed_case():
     assert not cmakelint.lint.is_command_mixed_case("project")
     assert not cmakelint.lint.is_command_mixed_case("CMAKE_MINIMUM_REQUIRED")
     assert cmakelint.lint.is_command_mixed_case("CMAKE_MINIMUM_required")
+    assert not cmakelint.lint.is_command_mixed_case("_1")
 
 
 def test_clean_comment():
@@ -110,6 +123,10 @@ def test_repeat_logic_expression():
     do_test_check_repeat_logic(
         "ENDMACRO( my_macro foo bar baz)", "Expression repeated inside endmacro; " "better to use only ENDMACRO()"
     )
+    # With several logic keywords on a line the leftmost one is reported
+    do_test_check_repeat_logic(
+        "endforeach(else)", "Expression repeated inside endforeach; " "better to use only endforeach()"
+    )
 
 
 def test_find_tool():
@@ -180,6 +197,19 @@ def test_filter_control():
     do_test_multi_line_lint(("# lint_cmake: -whitespace/eol\n" "  foo() \n" "  foo()\n"), "")
 
 
+def test_should_print_error():
+    try:
+        cmakelint.state.LINT_STATE.set_filters("-whitespace,+whitespace/tabs")
+        assert not cmakelint.lint.should_print_error("whitespace/eol")
+        assert cmakelint.lint.should_print_error("whitespace/tabs")
+        assert cmakelint.lint.should_print_error("syntax")
+        cmakelint.state.LINT_STATE.filters = ["-"]
+        assert not cmakelint.lint.should_print_error("syntax")
+    finally:
+        cmakelint.state.LINT_STATE.reset()
+    assert cmakelint.lint.should_print_error("syntax")
+
+
 def test_bad_pragma():
     do_test_multi_line_lint(
         ("# lint_cmake: I am badly formed\n" "if(TRUE)\n" "endif()\n"), "Filter should start with - or +"
@@ -253,3 +283,43 @@ def test_indent():
         do_test_lint("   three_indent(test)", "")
     finally:
         cmakelint.state.LINT_STATE.reset()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="CRLF is the native line ending")
+def test_crlf_newline(tmp_path, capsys):
+    filename = tmp_path / "CMakeLists.txt"
+    filename.write_bytes(b"project(a)\r\n")
+    try:
+        cmakelint.lint.process_file(str(filename))
+        assert cmakelint.state.LINT_STATE.errors == 1
+    finally:
+        cmakelint.state.LINT_STATE.reset()
+    assert capsys.readouterr().out == (
+        f"{filename}:0: Unexpected carriage return found; better to use only \\n [whitespace/newline]\n"
+    )
+
+
+def test_cr_only_newline(tmp_path, capsys):
+    # Lone "\r" line endings split lines like universal newlines and are not reported
+    filename = tmp_path / "CMakeLists.txt"
+    filename.write_bytes(b"project(a)\rPROJECT(b)\r")
+    try:
+        cmakelint.lint.process_file(str(filename))
+    finally:
+        cmakelint.state.LINT_STATE.reset()
+    assert capsys.readouterr().out == (
+        f"{filename}:2: Do not mix upper and lower case commands [readability/mixedcase]\n"
+    )
+
+
+def test_mixed_newline(tmp_path, capsys):
+    # A lone "\r" inside a "\n" file still ends a line
+    filename = tmp_path / "CMakeLists.txt"
+    filename.write_bytes(b"# lint_cmake: -whitespace/eol\rproject(a)\rPROJECT(b) \nproject(c)\n")
+    try:
+        cmakelint.lint.process_file(str(filename))
+    finally:
+        cmakelint.state.LINT_STATE.reset()
+    assert capsys.readouterr().out == (
+        f"{filename}:3: Do not mix upper and lower case commands [readability/mixedcase]\n"
+    )